@@ -9,8 +9,16 @@ It works by providing a system prompt that gets automatically applied.
 import asyncio
 import json
 import logging
+import queue
+import re
 import sys
-from typing import Any, Sequence
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Awaitable, Callable, Final, Sequence
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -27,9 +35,101 @@ except ImportError:
 # Initialize the MCP server
 app = Server("ai-validation-auto")
 
-def create_expert_system_prompt() -> str:
-    """Create the expert system prompt that gets automatically applied."""
-    return """🚀 **AI VALIDATION: PROMPT AUTOMATICALLY OPTIMIZED** 🚀
+# Keyword vocabularies used to classify prompts. Keywords are matched as
+# substrings of the lower-cased prompt, so "debugging" still counts as technical.
+TECHNICAL_KEYWORDS = frozenset({'code', 'programming', 'technical', 'debug', 'implement'})
+CREATIVE_KEYWORDS = frozenset({'write', 'create', 'design', 'creative'})
+ANALYTICAL_KEYWORDS = frozenset({'analyze', 'compare', 'evaluate', 'assess'})
+REASONING_KEYWORDS = frozenset({'why', 'how', 'explain'})
+
+# Narrower vocabularies reported by the analyze_prompt tool
+ANALYSIS_TECHNICAL_KEYWORDS = frozenset({'code', 'programming', 'technical'})
+ANALYSIS_CREATIVE_KEYWORDS = frozenset({'write', 'create', 'design'})
+ANALYSIS_ANALYTICAL_KEYWORDS = frozenset({'analyze', 'compare', 'evaluate'})
+
+# Category bit flags returned by scan_prompt_keywords()
+TECHNICAL = 1 << 0
+CREATIVE = 1 << 1
+ANALYTICAL = 1 << 2
+REASONING = 1 << 3
+ANALYSIS_TECHNICAL = 1 << 4
+ANALYSIS_CREATIVE = 1 << 5
+ANALYSIS_ANALYTICAL = 1 << 6
+
+KEYWORD_CATEGORIES = (
+    (TECHNICAL, TECHNICAL_KEYWORDS),
+    (CREATIVE, CREATIVE_KEYWORDS),
+    (ANALYTICAL, ANALYTICAL_KEYWORDS),
+    (REASONING, REASONING_KEYWORDS),
+    (ANALYSIS_TECHNICAL, ANALYSIS_TECHNICAL_KEYWORDS),
+    (ANALYSIS_CREATIVE, ANALYSIS_CREATIVE_KEYWORDS),
+    (ANALYSIS_ANALYTICAL, ANALYSIS_ANALYTICAL_KEYWORDS),
+)
+
+def _build_keyword_flags(categories) -> dict[str, int]:
+    """Map every keyword to the union of the category flags it signals."""
+    flags: dict[str, int] = {}
+    for flag, keywords in categories:
+        for keyword in keywords:
+            flags[keyword] = flags.get(keyword, 0) | flag
+    # The scanner only reports the longest keyword starting at each position,
+    # so a keyword also carries the flags of every keyword it starts with
+    # ("creative" implies "create").
+    combined = {}
+    for keyword in flags:
+        combined[keyword] = 0
+        for other, flag in flags.items():
+            if keyword.startswith(other):
+                combined[keyword] |= flag
+    return combined
+
+_KEYWORD_FLAGS = _build_keyword_flags(KEYWORD_CATEGORIES)
+# Longest alternatives first so each match is the longest keyword at its position
+_KEYWORD_PATTERN = re.compile(
+    '|'.join(re.escape(k) for k in sorted(_KEYWORD_FLAGS, key=len, reverse=True))
+)
+
+def scan_prompt_keywords(prompt_lower: str) -> int:
+    """Scan a lower-cased prompt once and return the category flags it hits.
+
+    Each search resumes one character after the previous match start, so
+    overlapping keywords ("codesign" hits both "code" and "design") are found
+    exactly as the per-keyword substring checks would find them.
+    """
+    search = _KEYWORD_PATTERN.search
+    found = 0
+    match = search(prompt_lower)
+    while match is not None:
+        found |= _KEYWORD_FLAGS[match.group()]
+        match = search(prompt_lower, match.start() + 1)
+    return found
+
+@dataclass(frozen=True, slots=True)
+class PromptAnalysis:
+    """Measurements of a prompt shared by the optimizer and the analyze_prompt tool."""
+    length: int
+    word_count: int
+    question_count: int
+    categories: int  # keyword category flags from scan_prompt_keywords()
+
+@lru_cache(maxsize=1024)
+def analyze_prompt_characteristics(prompt: str) -> PromptAnalysis:
+    """Measure a prompt in one pass: length, word/question counts and keyword flags.
+
+    Shared by the optimizer and the analyze_prompt tool so the prompt is
+    lower-cased, split and scanned only once. Results are cached, so calling
+    analyze_prompt and then auto_optimize on the same prompt analyzes it once;
+    the frozen dataclass keeps callers from mutating the cached value.
+    """
+    return PromptAnalysis(
+        length=len(prompt),
+        word_count=len(prompt.split()),
+        question_count=prompt.count('?'),
+        categories=scan_prompt_keywords(prompt.lower()),
+    )
+
+# Expert system prompt that gets automatically applied
+EXPERT_SYSTEM_PROMPT: Final[str] = """🚀 **AI VALIDATION: PROMPT AUTOMATICALLY OPTIMIZED** 🚀
 
 You are a world-class expert AI assistant with deep knowledge across all domains. This response has been enhanced with expert-level prompt engineering techniques.
 
@@ -60,204 +160,226 @@ Always respond as if you are the most qualified expert in the relevant field, wi
 
 """
 
-def optimize_user_prompt(user_prompt: str) -> str:
-    """Automatically optimize any user prompt with expert techniques."""
+# Status text served by the context://optimization-active resource
+OPTIMIZATION_ACTIVE_TEXT: Final[str] = """🚀 **AI VALIDATION: AUTOMATIC OPTIMIZATION ACTIVE** 🚀
+
+✨ **STATUS**: All prompts are being automatically enhanced with expert-level techniques
+
+🔧 **ACTIVE OPTIMIZATIONS**:
+• Expert system identity automatically applied
+• Domain expertise detection (technical/creative/analytical)
+• Clarity and detail enhancement
+• Structured response formatting
+• Practical examples and best practices
+• Step-by-step reasoning for complex topics
+
+💡 **HOW TO USE**: 
+Just ask any question normally - optimization happens automatically behind the scenes!
+
+📊 **EXAMPLE**: 
+Your question: "How do I write better Python code?"
+Enhanced with: Technical expertise, best practices, examples, step-by-step guidance
+
+🎯 **RESULT**: More comprehensive, expert-level responses without any extra work!
+"""
+
+def create_expert_system_prompt() -> str:
+    """Return the expert system prompt that gets automatically applied."""
+    return EXPERT_SYSTEM_PROMPT
+
+# Instructions appended to the optimized prompt by optimize_user_prompt()
+CLARITY_INSTRUCTION = "\n\nPlease provide a comprehensive and detailed response with specific examples and practical guidance."
+TECHNICAL_CONTEXT = "\n\nAs a senior technical expert, please include best practices, potential pitfalls, and real-world implementation considerations."
+CREATIVE_CONTEXT = "\n\nAs a creative professional, please provide innovative approaches, multiple options, and creative insights."
+ANALYTICAL_CONTEXT = "\n\nAs an analytical expert, please provide systematic analysis, multiple perspectives, and data-driven insights."
+STRUCTURE_INSTRUCTION = "\n\nPlease structure your response with clear sections and step-by-step explanations."
+EXAMPLES_INSTRUCTION = "\n\nPlease include concrete examples to illustrate your points."
+REASONING_INSTRUCTION = "\n\nPlease explain your reasoning and methodology."
+
+# Summary bullet for each optimization optimize_user_prompt() can apply
+_OPTIMIZATION_BULLETS = {
+    'clarity': "  • 🎯 Enhanced clarity and detail requirements",
+    'technical': "  • 🛠️ Technical expertise context added",
+    'creative': "  • 🎨 Creative expertise context added",
+    'analytical': "  • 📊 Analytical expertise context added",
+    'structure': "  • 📋 Structured response format requested",
+    'examples': "  • 💡 Examples and illustrations requested",
+    'reasoning': "  • 🧠 Reasoning and methodology requested",
+    'expert': "  • 🌟 Expert system identity applied",
+}
+
+def _build_optimized_prompt(user_prompt: str) -> str:
+    """Automatically optimize any user prompt with expert techniques.
+
+    Uncached; callers go through optimize_user_prompt() or
+    optimize_user_prompt_async(), which consult the prompt cache first.
+    """
     
     # Analysis of prompt characteristics
-    has_question = '?' in user_prompt
-    is_technical = any(word in user_prompt.lower() for word in ['code', 'programming', 'technical', 'debug', 'implement'])
-    is_creative = any(word in user_prompt.lower() for word in ['write', 'create', 'design', 'creative'])
-    is_analytical = any(word in user_prompt.lower() for word in ['analyze', 'compare', 'evaluate', 'assess'])
-    needs_examples = len(user_prompt.split()) < 20 and has_question
-    is_complex = len(user_prompt.split()) > 30 or user_prompt.count('?') > 1
+    analysis = analyze_prompt_characteristics(user_prompt)
+    word_count = analysis.word_count
+    question_count = analysis.question_count
+    categories = analysis.categories
+    has_question = question_count > 0
+    is_technical = bool(categories & TECHNICAL)
+    is_creative = bool(categories & CREATIVE)
+    is_analytical = bool(categories & ANALYTICAL)
+    needs_examples = word_count < 20 and has_question
+    is_complex = word_count > 30 or question_count > 1
     
-    # Add optimization indicator and original prompt
-    optimized = f"""🔧 **ORIGINAL PROMPT**: {user_prompt}
+    # Add optimization indicator and original prompt; sections are collected
+    # and joined once at the end instead of re-copying the growing string
+    optimized_parts = [f"""🔧 **ORIGINAL PROMPT**: {user_prompt}
 
-✨ **AUTO-OPTIMIZED VERSION**: """
+✨ **AUTO-OPTIMIZED VERSION**: """]
     
     optimizations_applied = []
     
     # Add clarity and specificity
-    if len(user_prompt.split()) < 10:
-        optimized += "\n\nPlease provide a comprehensive and detailed response with specific examples and practical guidance."
-        optimizations_applied.append("🎯 Enhanced clarity and detail requirements")
+    if word_count < 10:
+        optimized_parts.append(CLARITY_INSTRUCTION)
+        optimizations_applied.append('clarity')
     
     # Add domain expertise context
     if is_technical:
-        optimized += "\n\nAs a senior technical expert, please include best practices, potential pitfalls, and real-world implementation considerations."
-        optimizations_applied.append("🛠️ Technical expertise context added")
+        optimized_parts.append(TECHNICAL_CONTEXT)
+        optimizations_applied.append('technical')
     elif is_creative:
-        optimized += "\n\nAs a creative professional, please provide innovative approaches, multiple options, and creative insights."
-        optimizations_applied.append("🎨 Creative expertise context added")
+        optimized_parts.append(CREATIVE_CONTEXT)
+        optimizations_applied.append('creative')
     elif is_analytical:
-        optimized += "\n\nAs an analytical expert, please provide systematic analysis, multiple perspectives, and data-driven insights."
-        optimizations_applied.append("📊 Analytical expertise context added")
+        optimized_parts.append(ANALYTICAL_CONTEXT)
+        optimizations_applied.append('analytical')
     
     # Add structure for complex queries
     if is_complex:
-        optimized += "\n\nPlease structure your response with clear sections and step-by-step explanations."
-        optimizations_applied.append("📋 Structured response format requested")
+        optimized_parts.append(STRUCTURE_INSTRUCTION)
+        optimizations_applied.append('structure')
     
     # Add examples for simple queries
     if needs_examples:
-        optimized += "\n\nPlease include concrete examples to illustrate your points."
-        optimizations_applied.append("💡 Examples and illustrations requested")
+        optimized_parts.append(EXAMPLES_INSTRUCTION)
+        optimizations_applied.append('examples')
     
     # Add reasoning for analytical requests
-    if any(word in user_prompt.lower() for word in ['why', 'how', 'explain']):
-        optimized += "\n\nPlease explain your reasoning and methodology."
-        optimizations_applied.append("🧠 Reasoning and methodology requested")
+    if categories & REASONING:
+        optimized_parts.append(REASONING_INSTRUCTION)
+        optimizations_applied.append('reasoning')
     
     # Always add expert system
-    optimizations_applied.append("🌟 Expert system identity applied")
+    optimizations_applied.append('expert')
     
     # Add optimization summary
-    optimization_summary = f"""
-
-🔍 **OPTIMIZATIONS APPLIED**:
-{chr(10).join(f"  • {opt}" for opt in optimizations_applied)}
-
----
-"""
-    
-    return optimized + optimization_summary
-
-# === MCP SERVER IMPLEMENTATION ===
+    bullets = "\n".join(_OPTIMIZATION_BULLETS[opt] for opt in optimizations_applied)
+    optimized_parts.append(f"\n\n🔍 **OPTIMIZATIONS APPLIED**:\n{bullets}\n\n---\n")
+    return "".join(optimized_parts)
+
+class PromptCache:
+    """Bounded LRU map from prompt text to its optimized version.
+
+    Unlike functools.lru_cache it can be checked without computing the
+    value, so the async entry points serve hits on the event loop and only
+    send misses to a worker thread. Worker threads also store results,
+    hence the lock.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, prompt: str) -> str | None:
+        """Return the cached result for prompt, or None, counting the lookup."""
+        with self._lock:
+            optimized = self._entries.get(prompt)
+            if optimized is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(prompt)
+            return optimized
+
+    def put(self, prompt: str, optimized: str) -> None:
+        """Store a result, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[prompt] = optimized
+            self._entries.move_to_end(prompt)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+# The result depends only on the prompt text, so repeated prompts (retries,
+# regenerations) are served from this cache.
+OPTIMIZE_CACHE_SIZE = 1024
+_optimized_prompts = PromptCache(OPTIMIZE_CACHE_SIZE)
+
+def _optimize_and_cache(user_prompt: str) -> str:
+    """Optimize a prompt that missed the cache and store the result."""
+    optimized = _build_optimized_prompt(user_prompt)
+    _optimized_prompts.put(user_prompt, optimized)
+    return optimized
+
+def _optimize_and_cache_all(user_prompts: list[str]) -> list[str]:
+    """Optimize several cache misses in one go (one thread hop for a batch)."""
+    return [_optimize_and_cache(prompt) for prompt in user_prompts]
 
-@app.list_resources()
-async def handle_list_resources() -> list[types.Resource]:
-    """Provide the expert system as a resource."""
-    return [
-        types.Resource(
-            uri="system://expert-context",
-            name="🚀 Auto-Optimized Expert System",
-            description="AUTOMATIC: World-class expert system applied to all responses - no manual action required",
-            mimeType="text/plain"
-        ),
-        types.Resource(
-            uri="context://optimization-active",
-            name="✨ Optimization Status: ACTIVE",
-            description="All prompts are being automatically enhanced with expert techniques",
-            mimeType="text/plain"
-        )
-    ]
-
-@app.read_resource()
-async def handle_read_resource(uri: str) -> str:
-    """Provide resources including the expert system prompt."""
-    if uri == "system://expert-context":
-        return create_expert_system_prompt()
-    elif uri == "context://optimization-active":
-        return """🚀 **AI VALIDATION: AUTOMATIC OPTIMIZATION ACTIVE** 🚀
-
-✨ **STATUS**: All prompts are being automatically enhanced with expert-level techniques
-
-🔧 **ACTIVE OPTIMIZATIONS**:
-• Expert system identity automatically applied
-• Domain expertise detection (technical/creative/analytical)
-• Clarity and detail enhancement
-• Structured response formatting
-• Practical examples and best practices
-• Step-by-step reasoning for complex topics
-
-💡 **HOW TO USE**: 
-Just ask any question normally - optimization happens automatically behind the scenes!
-
-📊 **EXAMPLE**: 
-Your question: "How do I write better Python code?"
-Enhanced with: Technical expertise, best practices, examples, step-by-step guidance
-
-🎯 **RESULT**: More comprehensive, expert-level responses without any extra work!
-"""
-    return f"Resource not found: {uri}"
-
-@app.list_tools()
-async def handle_list_tools() -> list[types.Tool]:
-    """Provide tools for optimization."""
-    return [
-        types.Tool(
-            name="auto_optimize",
-            description="🚀 AUTOMATIC OPTIMIZATION: Enhance any prompt with world-class expert techniques instantly!",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "prompt": {
-                        "type": "string",
-                        "description": "Your original prompt to automatically optimize with expert techniques"
-                    }
-                },
-                "required": ["prompt"]
-            }
-        ),
-        types.Tool(
-            name="optimize_prompt",
-            description="Manually optimize a specific prompt with expert techniques",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "prompt": {
-                        "type": "string",
-                        "description": "The prompt to optimize"
-                    }
-                },
-                "required": ["prompt"]
-            }
-        ),
-        types.Tool(
-            name="analyze_prompt",
-            description="Analyze prompt characteristics and optimization opportunities",
-            inputSchema={
-                "type": "object", 
-                "properties": {
-                    "prompt": {
-                        "type": "string",
-                        "description": "The prompt to analyze"
-                    }
-                },
-                "required": ["prompt"]
-            }
-        )
-    ]
-
-@app.call_tool()
-async def handle_call_tool(name: str, arguments: dict | None) -> list[types.TextContent]:
-    """Handle tool calls for optimization."""
-    if arguments is None:
-        arguments = {}
-    
-    if name == "auto_optimize":
-        prompt = arguments.get("prompt", "")
-        if not prompt:
-            return [types.TextContent(type="text", text="Error: No prompt provided")]
-        
-        # Log the optimization
-        logger.info(f"🚀 AUTO-OPTIMIZING: {prompt[:50]}...")
-        
-        # Apply full optimization with visual indicators
-        expert_system = create_expert_system_prompt()
-        optimized = optimize_user_prompt(prompt)
-        
-        logger.info("✨ AUTO-OPTIMIZATION COMPLETE")
-        
-        # Return the full optimized response with clear indicators
-        response = f"""{expert_system}
+def optimize_user_prompt(user_prompt: str) -> str:
+    """Automatically optimize any user prompt, serving repeats from the cache."""
+    optimized = _optimized_prompts.get(user_prompt)
+    if optimized is None:
+        optimized = _optimize_and_cache(user_prompt)
+    return optimized
+
+# Prompts longer than this (in characters) are optimized in a worker thread
+# so a single large request does not stall the event loop for other clients.
+OFFLOAD_THRESHOLD = 1024
+
+async def optimize_user_prompt_async(user_prompt: str) -> str:
+    """Optimize a prompt, moving uncached long prompts off the event loop."""
+    optimized = _optimized_prompts.get(user_prompt)
+    if optimized is not None:
+        return optimized
+    if len(user_prompt) > OFFLOAD_THRESHOLD:
+        return await asyncio.to_thread(_optimize_and_cache, user_prompt)
+    return _optimize_and_cache(user_prompt)
+
+async def optimize_user_prompts_async(user_prompts: list[str]) -> dict[str, str]:
+    """Optimize each distinct prompt once, keyed by prompt text.
+
+    Cached prompts are answered on the event loop. The misses are offloaded
+    together only when their combined length is over OFFLOAD_THRESHOLD.
+    """
+    optimized = {}
+    missing = []
+    for prompt in dict.fromkeys(user_prompts):
+        cached = _optimized_prompts.get(prompt)
+        if cached is None:
+            missing.append(prompt)
+        else:
+            optimized[prompt] = cached
+
+    if sum(len(p) for p in missing) > OFFLOAD_THRESHOLD:
+        results = await asyncio.to_thread(_optimize_and_cache_all, missing)
+    else:
+        results = _optimize_and_cache_all(missing)
+    optimized.update(zip(missing, results))
+    return optimized
+
+# === TOOL RESPONSE TEMPLATES ===
+# Built once at import and filled with str.format_map() per request.
+
+AUTO_OPTIMIZE_RESPONSE_TEMPLATE = """{expert_system}
 
 {optimized}
 
 🎯 **OPTIMIZATION COMPLETE**: Your prompt has been enhanced with expert techniques and is ready for the LLM!
 """
-        return [types.TextContent(type="text", text=response)]
-    
-    elif name == "optimize_prompt":
-        prompt = arguments.get("prompt", "")
-        if not prompt:
-            return [types.TextContent(type="text", text="Error: No prompt provided")]
-        
-        optimized = optimize_user_prompt(prompt)
-        expert_system = create_expert_system_prompt()
-        
-        response = f"""# 🚀 Manual Prompt Optimization
+
+OPTIMIZE_PROMPT_RESPONSE_TEMPLATE = """# 🚀 Manual Prompt Optimization
 
 ## Original Prompt:
 {prompt}
@@ -271,122 +393,402 @@ async def handle_call_tool(name: str, arguments: dict | None) -> list[types.Text
 ## Combined Optimized Request:
 {expert_system}{optimized}
 """
-        return [types.TextContent(type="text", text=response)]
-    
-    elif name == "analyze_prompt":
-        prompt = arguments.get("prompt", "")
-        if not prompt:
-            return [types.TextContent(type="text", text="Error: No prompt provided")]
-        
-        # Analyze prompt characteristics
-        word_count = len(prompt.split())
-        has_question = '?' in prompt
-        is_technical = any(word in prompt.lower() for word in ['code', 'programming', 'technical'])
-        is_creative = any(word in prompt.lower() for word in ['write', 'create', 'design'])
-        is_analytical = any(word in prompt.lower() for word in ['analyze', 'compare', 'evaluate'])
-        
-        response = f"""# 📊 Prompt Analysis
+
+ANALYZE_PROMPT_RESPONSE_TEMPLATE = """# 📊 Prompt Analysis
 
 ## Basic Metrics:
-- **Length**: {len(prompt)} characters
+- **Length**: {length} characters
 - **Word Count**: {word_count} words
-- **Questions**: {prompt.count('?')} questions found
+- **Questions**: {question_count} questions found
 
 ## Content Classification:
-- **Technical**: {'✅' if is_technical else '❌'}
-- **Creative**: {'✅' if is_creative else '❌'}
-- **Analytical**: {'✅' if is_analytical else '❌'}
-- **Has Questions**: {'✅' if has_question else '❌'}
+- **Technical**: {technical}
+- **Creative**: {creative}
+- **Analytical**: {analytical}
+- **Has Questions**: {has_question}
 
 ## Optimization Applied:
 - **Expert System**: Automatically applied
-- **Domain Context**: {'Added' if any([is_technical, is_creative, is_analytical]) else 'General'}
-- **Clarity Enhancement**: {'Added' if word_count < 10 else 'Not needed'}
-- **Structure Request**: {'Added' if word_count > 30 else 'Not needed'}
+- **Domain Context**: {domain_context}
+- **Clarity Enhancement**: {clarity}
+- **Structure Request**: {structure}
 
 ## Automatic Enhancements:
 The system automatically optimizes all prompts with expert context and domain-specific improvements.
 """
-        return [types.TextContent(type="text", text=response)]
+
+# Upper bound on prompts per optimize_prompts_batch call
+MAX_BATCH_PROMPTS = 100
+
+# Optional "format" tool argument: "markdown" (default) or "json" for callers
+# that want the structured fields without the rendered report.
+RESPONSE_FORMAT_SCHEMA = {
+    "type": "string",
+    "enum": ["markdown", "json"],
+    "description": "Response format: 'markdown' (default) or 'json' for structured output"
+}
+
+def _json_response(data: Any) -> list[types.TextContent]:
+    """Serialize structured tool output as compact JSON text content."""
+    return [types.TextContent(type="text", text=json.dumps(data, ensure_ascii=False, separators=(',', ':')))]
+
+def _check_mark(flag: bool) -> str:
+    """Render a boolean as a check or cross mark."""
+    return '✅' if flag else '❌'
+
+# === MCP SERVER IMPLEMENTATION ===
+
+# Resource, tool and prompt descriptors are static, so they are built once at
+# import and the list_* handlers hand back the same objects on every request.
+_RESOURCES: list[types.Resource] = [
+    types.Resource(
+        uri="system://expert-context",
+        name="🚀 Auto-Optimized Expert System",
+        description="AUTOMATIC: World-class expert system applied to all responses - no manual action required",
+        mimeType="text/plain"
+    ),
+    types.Resource(
+        uri="context://optimization-active",
+        name="✨ Optimization Status: ACTIVE",
+        description="All prompts are being automatically enhanced with expert techniques",
+        mimeType="text/plain"
+    ),
+    types.Resource(
+        uri="stats://cache",
+        name="📈 Optimization Cache Statistics",
+        description="Hit/miss counts for the prompt optimization and analysis caches",
+        mimeType="text/plain"
+    )
+]
+
+@app.list_resources()
+async def handle_list_resources() -> list[types.Resource]:
+    """Provide the expert system as a resource."""
+    return _RESOURCES
+
+def _cache_stats_text() -> str:
+    """Render hit/miss statistics for the prompt caches."""
+    analysis_info = analyze_prompt_characteristics.cache_info()
+    caches = (
+        ("optimize_user_prompt", _optimized_prompts.hits, _optimized_prompts.misses,
+         len(_optimized_prompts), _optimized_prompts.maxsize),
+        ("analyze_prompt_characteristics", analysis_info.hits, analysis_info.misses,
+         analysis_info.currsize, analysis_info.maxsize),
+    )
+    lines = ["📈 **OPTIMIZATION CACHE STATISTICS**", ""]
+    for name, hits, misses, size, maxsize in caches:
+        lines.append(f"• {name}: {hits} hits, {misses} misses, {size}/{maxsize} entries")
+    return "\n".join(lines) + "\n"
+
+_RESOURCE_TEXT: dict[str, str] = {
+    "system://expert-context": EXPERT_SYSTEM_PROMPT,
+    "context://optimization-active": OPTIMIZATION_ACTIVE_TEXT,
+}
+
+# Resources whose text is generated on each read
+_DYNAMIC_RESOURCES: dict[str, Callable[[], str]] = {
+    "stats://cache": _cache_stats_text,
+}
+
+@app.read_resource()
+async def handle_read_resource(uri: str) -> str:
+    """Provide resources including the expert system prompt."""
+    uri_key = str(uri)
+    text = _RESOURCE_TEXT.get(uri_key)
+    if text is not None:
+        return text
+    render = _DYNAMIC_RESOURCES.get(uri_key)
+    if render is not None:
+        return render()
+    return f"Resource not found: {uri}"
+
+_TOOLS: list[types.Tool] = [
+    types.Tool(
+        name="auto_optimize",
+        description="🚀 AUTOMATIC OPTIMIZATION: Enhance any prompt with world-class expert techniques instantly!",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "prompt": {
+                    "type": "string",
+                    "description": "Your original prompt to automatically optimize with expert techniques"
+                },
+                "format": RESPONSE_FORMAT_SCHEMA
+            },
+            "required": ["prompt"]
+        }
+    ),
+    types.Tool(
+        name="optimize_prompt",
+        description="Manually optimize a specific prompt with expert techniques",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "prompt": {
+                    "type": "string",
+                    "description": "The prompt to optimize"
+                },
+                "format": RESPONSE_FORMAT_SCHEMA
+            },
+            "required": ["prompt"]
+        }
+    ),
+    types.Tool(
+        name="analyze_prompt",
+        description="Analyze prompt characteristics and optimization opportunities",
+        inputSchema={
+            "type": "object", 
+            "properties": {
+                "prompt": {
+                    "type": "string",
+                    "description": "The prompt to analyze"
+                },
+                "format": RESPONSE_FORMAT_SCHEMA
+            },
+            "required": ["prompt"]
+        }
+    ),
+    types.Tool(
+        name="optimize_prompts_batch",
+        description="Optimize several prompts in one call and return the results as a JSON array",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "prompts": {
+                    "type": "array",
+                    "items": {"type": "string", "minLength": 1},
+                    "minItems": 1,
+                    "maxItems": MAX_BATCH_PROMPTS,
+                    "description": "The prompts to optimize"
+                }
+            },
+            "required": ["prompts"]
+        }
+    )
+]
+
+@app.list_tools()
+async def handle_list_tools() -> list[types.Tool]:
+    """Provide tools for optimization."""
+    return _TOOLS
+
+# Shared error responses; MCP content objects are never mutated after return
+_ERR_NO_PROMPT: list[types.TextContent] = [types.TextContent(type="text", text="Error: No prompt provided")]
+_ERR_NO_PROMPTS: list[types.TextContent] = [types.TextContent(type="text", text="Error: No prompts provided")]
+
+async def _tool_auto_optimize(arguments: dict) -> list[types.TextContent]:
+    """Optimize a prompt and return it with the expert system context."""
+    prompt = arguments.get("prompt", "")
+    if not prompt:
+        return _ERR_NO_PROMPT
+    
+    # Log the optimization
+    logger.info("🚀 AUTO-OPTIMIZING: %.50s...", prompt)
+    
+    # Apply full optimization with visual indicators
+    expert_system = EXPERT_SYSTEM_PROMPT
+    optimized = await optimize_user_prompt_async(prompt)
+    
+    logger.debug("✨ AUTO-OPTIMIZATION COMPLETE")
+    
+    if arguments.get("format") == "json":
+        return _json_response({'prompt': prompt, 'expert_system': expert_system, 'optimized': optimized})
     
+    # Return the full optimized response with clear indicators
+    response = AUTO_OPTIMIZE_RESPONSE_TEMPLATE.format_map({
+        'expert_system': expert_system,
+        'optimized': optimized,
+    })
+    return [types.TextContent(type="text", text=response)]
+
+async def _tool_optimize_prompt(arguments: dict) -> list[types.TextContent]:
+    """Show the original, optimized and combined prompts side by side."""
+    prompt = arguments.get("prompt", "")
+    if not prompt:
+        return _ERR_NO_PROMPT
+    
+    optimized = await optimize_user_prompt_async(prompt)
+    expert_system = EXPERT_SYSTEM_PROMPT
+    
+    if arguments.get("format") == "json":
+        return _json_response({'prompt': prompt, 'expert_system': expert_system, 'optimized': optimized})
+    
+    response = OPTIMIZE_PROMPT_RESPONSE_TEMPLATE.format_map({
+        'prompt': prompt,
+        'optimized': optimized,
+        'expert_system': expert_system,
+    })
+    return [types.TextContent(type="text", text=response)]
+
+async def _tool_analyze_prompt(arguments: dict) -> list[types.TextContent]:
+    """Report prompt metrics, content classification and planned optimizations."""
+    prompt = arguments.get("prompt", "")
+    if not prompt:
+        return _ERR_NO_PROMPT
+    
+    # Analyze prompt characteristics
+    analysis = analyze_prompt_characteristics(prompt)
+    word_count = analysis.word_count
+    question_count = analysis.question_count
+    categories = analysis.categories
+    has_question = question_count > 0
+    is_technical = bool(categories & ANALYSIS_TECHNICAL)
+    is_creative = bool(categories & ANALYSIS_CREATIVE)
+    is_analytical = bool(categories & ANALYSIS_ANALYTICAL)
+    
+    domain_context = is_technical or is_creative or is_analytical
+    
+    if arguments.get("format") == "json":
+        return _json_response({
+            'length': analysis.length,
+            'word_count': word_count,
+            'question_count': question_count,
+            'is_technical': is_technical,
+            'is_creative': is_creative,
+            'is_analytical': is_analytical,
+            'has_question': has_question,
+            'domain_context': domain_context,
+            'clarity_enhancement': word_count < 10,
+            'structure_request': word_count > 30,
+        })
+    
+    response = ANALYZE_PROMPT_RESPONSE_TEMPLATE.format_map({
+        'length': analysis.length,
+        'word_count': word_count,
+        'question_count': question_count,
+        'technical': _check_mark(is_technical),
+        'creative': _check_mark(is_creative),
+        'analytical': _check_mark(is_analytical),
+        'has_question': _check_mark(has_question),
+        'domain_context': 'Added' if domain_context else 'General',
+        'clarity': 'Added' if word_count < 10 else 'Not needed',
+        'structure': 'Added' if word_count > 30 else 'Not needed',
+    })
+    return [types.TextContent(type="text", text=response)]
+
+async def _tool_optimize_prompts_batch(arguments: dict) -> list[types.TextContent]:
+    """Optimize a list of prompts and return the results as a JSON array."""
+    prompts = arguments.get("prompts")
+    if not prompts or not isinstance(prompts, list):
+        return _ERR_NO_PROMPTS
+    if len(prompts) > MAX_BATCH_PROMPTS:
+        return [types.TextContent(type="text", text=f"Error: Too many prompts ({len(prompts)}); the limit is {MAX_BATCH_PROMPTS}")]
+    for index, prompt in enumerate(prompts):
+        if not isinstance(prompt, str) or not prompt:
+            return [types.TextContent(type="text", text=f"Error: Prompt at index {index} is empty or not a string")]
+    
+    logger.info("🚀 BATCH-OPTIMIZING: %d prompts", len(prompts))
+    
+    # Optimize each distinct prompt once, then map back to input order
+    optimized = await optimize_user_prompts_async(prompts)
+    return _json_response([{"prompt": p, "optimized": optimized[p]} for p in prompts])
+
+_TOOL_HANDLERS: dict[str, Callable[[dict], Awaitable[list[types.TextContent]]]] = {
+    "auto_optimize": _tool_auto_optimize,
+    "optimize_prompt": _tool_optimize_prompt,
+    "analyze_prompt": _tool_analyze_prompt,
+    "optimize_prompts_batch": _tool_optimize_prompts_batch,
+}
+
+@lru_cache(maxsize=64)
+def _unknown_tool(name: str) -> list[types.TextContent]:
+    """Build (once per name) the response for a call to an unknown tool."""
     return [types.TextContent(type="text", text=f"Unknown tool: {name}")]
 
+@app.call_tool()
+async def handle_call_tool(name: str, arguments: dict | None) -> list[types.TextContent]:
+    """Handle tool calls for optimization."""
+    handler = _TOOL_HANDLERS.get(name)
+    if handler is None:
+        return _unknown_tool(name)
+    return await handler(arguments or {})
+
+_PROMPTS: list[types.Prompt] = [
+    types.Prompt(
+        name="expert_system",
+        description="Expert system prompt automatically applied to all interactions",
+        arguments=[]
+    ),
+    types.Prompt(
+        name="optimize_user_input",
+        description="Automatically optimize any user input with expert techniques",
+        arguments=[
+            types.PromptArgument(
+                name="user_input",
+                description="User's original input to optimize",
+                required=True
+            )
+        ]
+    )
+]
+
 @app.list_prompts()
 async def handle_list_prompts() -> list[types.Prompt]:
     """Provide prompts that can be used for automatic optimization."""
-    return [
-        types.Prompt(
-            name="expert_system",
-            description="Expert system prompt automatically applied to all interactions",
-            arguments=[]
-        ),
-        types.Prompt(
-            name="optimize_user_input",
-            description="Automatically optimize any user input with expert techniques",
-            arguments=[
-                types.PromptArgument(
-                    name="user_input",
-                    description="User's original input to optimize",
-                    required=True
-                )
-            ]
+    return _PROMPTS
+
+# The expert_system prompt is fully static, so its result is built once.
+# MCP prompt messages only allow the "user" and "assistant" roles, so the
+# expert system context is delivered as a leading user message.
+_EXPERT_SYSTEM_RESULT = types.GetPromptResult(
+    description="Expert system prompt for world-class responses",
+    messages=[
+        types.PromptMessage(
+            role="user",
+            content=types.TextContent(type="text", text=EXPERT_SYSTEM_PROMPT)
         )
     ]
+)
 
-@app.get_prompt()
-async def handle_get_prompt(name: str, arguments: dict | None) -> types.GetPromptResult:
-    """Handle prompt requests."""
-    if arguments is None:
-        arguments = {}
-    
-    if name == "expert_system":
-        expert_prompt = create_expert_system_prompt()
+async def _prompt_expert_system(arguments: dict) -> types.GetPromptResult:
+    """Return the expert system prompt as a user message."""
+    return _EXPERT_SYSTEM_RESULT
+
+async def _prompt_optimize_user_input(arguments: dict) -> types.GetPromptResult:
+    """Return the expert system prompt plus the optimized user input."""
+    user_input = arguments.get("user_input", "")
+    if not user_input:
         return types.GetPromptResult(
-            description="Expert system prompt for world-class responses",
+            description="Error: No user input provided",
             messages=[
                 types.PromptMessage(
-                    role="system",
-                    content=types.TextContent(type="text", text=expert_prompt)
+                    role="user",
+                    content=types.TextContent(type="text", text="Error: No user input provided for optimization")
                 )
             ]
         )
     
-    elif name == "optimize_user_input":
-        user_input = arguments.get("user_input", "")
-        if not user_input:
-            return types.GetPromptResult(
-                description="Error: No user input provided",
-                messages=[
-                    types.PromptMessage(
-                        role="user",
-                        content=types.TextContent(type="text", text="Error: No user input provided for optimization")
-                    )
-                ]
-            )
-        
-        # Log the optimization activity
-        logger.info(f"🔧 OPTIMIZING PROMPT: {user_input[:50]}...")
-        
-        # Apply expert system + optimized user input
-        expert_system = create_expert_system_prompt()
-        optimized_input = optimize_user_prompt(user_input)
-        
-        logger.info("✨ PROMPT OPTIMIZATION COMPLETE - Expert techniques applied")
-        
-        return types.GetPromptResult(
-            description="Automatically optimized user input with expert system",
-            messages=[
-                types.PromptMessage(
-                    role="system",
-                    content=types.TextContent(type="text", text=expert_system)
-                ),
-                types.PromptMessage(
-                    role="user", 
-                    content=types.TextContent(type="text", text=optimized_input)
-                )
-            ]
-        )
+    # Log the optimization activity
+    logger.info("🔧 OPTIMIZING PROMPT: %.50s...", user_input)
+    
+    # Apply expert system + optimized user input
+    expert_system = EXPERT_SYSTEM_PROMPT
+    optimized_input = await optimize_user_prompt_async(user_input)
+    
+    logger.debug("✨ PROMPT OPTIMIZATION COMPLETE - Expert techniques applied")
     
+    return types.GetPromptResult(
+        description="Automatically optimized user input with expert system",
+        messages=[
+            types.PromptMessage(
+                role="user",
+                content=types.TextContent(type="text", text=expert_system)
+            ),
+            types.PromptMessage(
+                role="user", 
+                content=types.TextContent(type="text", text=optimized_input)
+            )
+        ]
+    )
+
+_PROMPT_HANDLERS: dict[str, Callable[[dict], Awaitable[types.GetPromptResult]]] = {
+    "expert_system": _prompt_expert_system,
+    "optimize_user_input": _prompt_optimize_user_input,
+}
+
+@lru_cache(maxsize=64)
+def _unknown_prompt(name: str) -> types.GetPromptResult:
+    """Build (once per name) the response for a request for an unknown prompt."""
     return types.GetPromptResult(
         description="Unknown prompt",
         messages=[
@@ -397,18 +799,46 @@ async def handle_get_prompt(name: str, arguments: dict | None) -> types.GetPromp
         ]
     )
 
+@app.get_prompt()
+async def handle_get_prompt(name: str, arguments: dict | None) -> types.GetPromptResult:
+    """Handle prompt requests."""
+    handler = _PROMPT_HANDLERS.get(name)
+    if handler is None:
+        return _unknown_prompt(name)
+    return await handler(arguments or {})
+
+@contextmanager
+def queued_logging():
+    """Hand log records to a background thread while the server runs.
+
+    Request handlers then only enqueue records instead of blocking on stderr
+    writes; the original handlers are restored (and the queue flushed) on exit.
+    """
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    try:
+        yield
+    finally:
+        listener.stop()
+        root.handlers = handlers
+
 async def main():
     """Main entry point for the MCP server."""
-    logger.info("🚀 Starting AI Validation MCP Server (Automatic Mode)")
-    logger.info("✨ All prompts will be automatically optimized with expert techniques")
-    
-    # Use stdin/stdout for communication with Cursor
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await app.run(
-            read_stream,
-            write_stream,
-            app.create_initialization_options()
-        )
+    with queued_logging():
+        logger.info("🚀 Starting AI Validation MCP Server (Automatic Mode)")
+        logger.info("✨ All prompts will be automatically optimized with expert techniques")
+        
+        # Use stdin/stdout for communication with Cursor
+        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+            await app.run(
+                read_stream,
+                write_stream,
+                app.create_initialization_options()
+            )
 
 if __name__ == "__main__":
     try:
@@ -416,5 +846,5 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
-        logger.error(f"Server error: {e}")
+        logger.error("Server error: %s", e)
         sys.exit(1)
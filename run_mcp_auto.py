@@ -7,7 +7,6 @@ Runs the fully automatic AI Validation MCP server.
 
 import os
 import sys
-import subprocess
 
 def main():
     # Get the directory where this script is located